@@ -14,7 +14,8 @@ Fixes:
 """
 
 import pandas as pd
-import json
+import numpy as np
+import orjson
 import os
 import re
 from datetime import datetime, timedelta
@@ -83,6 +84,17 @@ AI_EXCLUSIONS = [
     'breaking', 'speaking', 'media', 'via'
 ]
 
+# Single precompiled matcher equivalent to the keyword/boundary/exclusion rules
+# in detect_ai, so a whole text column can be scanned in one regex pass.
+# A bare 'ia'/'ki' matched on \b is always its own token, so only the
+# 'ai' token rule needs the exclusion list.
+AI_PATTERN = re.compile(
+    '|'.join(re.escape(kw) for kw in AI_KEYWORDS) +
+    r'|(?:^|\s)(?:' + '|'.join(re.escape(kw) for kw in AI_KEYWORDS_WORD_BOUNDARY if kw.startswith('#')) + r')(?:\s|$)' +
+    r'|\b(?:' + '|'.join(re.escape(kw) for kw in AI_KEYWORDS_WORD_BOUNDARY if not kw.startswith('#')) + r')\b' +
+    r'|\b(?!(?:' + '|'.join(re.escape(w) for w in AI_EXCLUSIONS) + r')\b)\w*ai'
+)
+
 # Colors
 CYAN_FILL = PatternFill(start_color="E0FFFF", end_color="E0FFFF", fill_type="solid")
 ORANGE_FILL = PatternFill(start_color="FFE4B5", end_color="FFE4B5", fill_type="solid")
@@ -111,6 +123,18 @@ URGENCY_COLORS = {
 }
 
 
+AUTHOR_COLUMNS = [
+    # Most common after flattening
+    'authorMeta_name', 'authorMeta_uniqueId', 'authorMeta_nickname',
+    # Alternative naming
+    'author_name', 'authorName', 'author',
+    # Direct fields
+    'username', 'creator', 'nickname',
+    # With dots (in case data comes from different source)
+    'authorMeta.name', 'authorMeta.uniqueId'
+]
+
+
 def get_author_name(row):
     """Extract author name from various possible column names.
     
@@ -119,22 +143,27 @@ def get_author_name(row):
     - Direct: {"author": "user"}
     - Various naming conventions across different scraper versions
     """
-    possible_cols = [
-        # Most common after flattening
-        'authorMeta_name', 'authorMeta_uniqueId', 'authorMeta_nickname',
-        # Alternative naming
-        'author_name', 'authorName', 'author',
-        # Direct fields
-        'username', 'creator', 'nickname',
-        # With dots (in case data comes from different source)
-        'authorMeta.name', 'authorMeta.uniqueId'
-    ]
-    for col in possible_cols:
+    for col in AUTHOR_COLUMNS:
         if col in row.index and pd.notna(row[col]) and str(row[col]).strip():
             return str(row[col]).strip()
     return 'Unknown'
 
 
+def get_author_name_vec(df):
+    """Vectorized get_author_name: first non-blank author column per row."""
+    authors = pd.Series('Unknown', index=df.index, dtype=object)
+    unresolved = pd.Series(True, index=df.index)
+    for col in AUTHOR_COLUMNS:
+        if col not in df.columns:
+            continue
+        values = df[col].astype(object)
+        stripped = values.where(values.isna(), values.astype(str).str.strip())
+        found = unresolved & stripped.notna() & (stripped != '')
+        authors[found] = stripped[found]
+        unresolved &= ~found
+    return authors
+
+
 def detect_ai(text):
     """Detect if content is AI-related."""
     if pd.isna(text):
@@ -178,6 +207,15 @@ def detect_ai(text):
     return 'NON-AI'
 
 
+def detect_ai_batch(texts):
+    """Vectorized detect_ai over a column of texts, using AI_PATTERN."""
+    texts = pd.Series(texts, dtype=object)
+    missing = texts.isna()
+    lowered = texts.where(missing, texts.astype(str).str.lower())
+    hits = lowered.str.contains(AI_PATTERN, na=False).to_numpy(dtype=bool)
+    return np.where(hits & ~missing.to_numpy(), 'AI', 'NON-AI')
+
+
 def calculate_metrics(df):
     """Calculate time-normalized metrics."""
     now = datetime.utcnow()
@@ -219,6 +257,26 @@ def calculate_metrics(df):
     return df
 
 
+# Status codes index into STATUS_LABELS
+STATUS_NEW, STATUS_SPIKING, STATUS_RISING, STATUS_COOLING, STATUS_DYING = range(5)
+STATUS_LABELS = np.array(['🆕 NEW', '🚀 SPIKING', '📈 RISING', '📉 COOLING', '❄️ DYING'], dtype=object)
+
+CATEGORY_COLUMNS = ['Market', 'AI_CATEGORY', 'status', 'acceleration_status', 'BUILD_NOW']
+
+
+def downcast(df):
+    """Shrink integer columns and store low-cardinality label columns as category.
+    
+    Float metrics stay float64 - they feed thresholds and Excel output.
+    """
+    for col in df.select_dtypes(include='integer').columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
+
+
 def calculate_status(df, yesterday_data=None):
     """Calculate 24h status based on momentum delta."""
     if yesterday_data is None:
@@ -231,28 +289,24 @@ def calculate_status(df, yesterday_data=None):
         df['status'] = '🆕 NEW'
         return df
     
-    yesterday_momentum = dict(zip(
-        yesterday_df['webVideoUrl'],
-        yesterday_df.get('momentum_score', [0] * len(yesterday_df))
-    ))
-    
-    def get_status(row):
-        url = row.get('webVideoUrl', '')
-        if url not in yesterday_momentum:
-            return '🆕 NEW'
-        
-        delta = row['momentum_score'] - yesterday_momentum.get(url, 0)
-        
-        if delta > 100:
-            return '🚀 SPIKING'
-        elif delta > 0:
-            return '📈 RISING'
-        elif delta > -100:
-            return '📉 COOLING'
-        else:
-            return '❄️ DYING'
-    
-    df['status'] = df.apply(get_status, axis=1)
+    yesterday_momentum = pd.Series(
+        yesterday_df.get('momentum_score', pd.Series(0, index=yesterday_df.index)).to_numpy(),
+        index=yesterday_df['webVideoUrl']
+    )
+    # Later records win for repeated URLs, as with the previous dict(zip(...))
+    yesterday_momentum = yesterday_momentum[~yesterday_momentum.index.duplicated(keep='last')]
+    
+    urls = df['webVideoUrl']
+    is_new = ~urls.isin(yesterday_momentum.index).to_numpy()
+    delta = pd.to_numeric(df['momentum_score'] - urls.map(yesterday_momentum), errors='coerce').to_numpy(dtype=float)
+    
+    # NaN deltas fail every comparison and fall through to DYING
+    codes = np.select(
+        [is_new, delta > 100, delta > 0, delta > -100],
+        [STATUS_NEW, STATUS_SPIKING, STATUS_RISING, STATUS_COOLING],
+        default=STATUS_DYING
+    )
+    df['status'] = np.take(STATUS_LABELS, codes)
     return df
 
 
@@ -272,6 +326,22 @@ def calculate_build_now(row):
         return 'NO'
 
 
+def calculate_build_now_vec(df):
+    """Vectorized calculate_build_now over the whole DataFrame."""
+    def metric(col, default):
+        if col not in df.columns:
+            return pd.Series(default, index=df.index, dtype=float)
+        return pd.to_numeric(df[col], errors='coerce')
+    
+    # NaN compares False, so missing metrics fall through to 'NO'
+    build = (
+        (metric('age_hours', 999) <= 72) &
+        (metric('shares_per_hour', 0) >= 5) &
+        (metric('views_per_hour', 0) >= 1000)
+    )
+    return pd.Series(np.where(build, 'BUILD NOW', 'NO'), index=df.index)
+
+
 def calculate_tutorial_trigger(row):
     """Calculate tutorial trigger and urgency."""
     momentum = row.get('momentum_score', 0)
@@ -701,30 +771,53 @@ def create_my_performance_sheet(ws, your_posts, today):
             ws.cell(row=idx, column=col).fill = LIGHT_YELLOW_FILL
 
 
+CACHE_COLUMNS = ['webVideoUrl', 'momentum_score']
+
+
+def _load_legacy_json_cache(us_path, uk_path):
+    """Load the pre-Parquet yesterday_*.json cache as DataFrames."""
+    with open(us_path, 'rb') as f:
+        us_data = orjson.loads(f.read())
+    with open(uk_path, 'rb') as f:
+        uk_data = orjson.loads(f.read())
+    # Validate cache structure - must be lists of dicts
+    if not isinstance(us_data, list) or not isinstance(uk_data, list):
+        print(f"  Cache format invalid (expected list, got {type(us_data).__name__}/{type(uk_data).__name__})")
+        return None, None
+    return pd.DataFrame(us_data), pd.DataFrame(uk_data)
+
+
 def load_yesterday_cache(cache_dir):
-    """Load yesterday's cached data."""
-    us_path = os.path.join(cache_dir, 'yesterday_us.json')
-    uk_path = os.path.join(cache_dir, 'yesterday_uk.json')
+    """Load yesterday's cached data as DataFrames.
+    
+    Reads the Parquet cache, falling back to the legacy JSON files written
+    by earlier versions. Returns (None, None) when no cache is available;
+    a market whose cache has zero records comes back as None, so callers
+    treat it as missing just like the old empty-list cache.
+    """
+    us_path = os.path.join(cache_dir, 'yesterday_us.parquet')
+    uk_path = os.path.join(cache_dir, 'yesterday_uk.parquet')
+    us_json_path = os.path.join(cache_dir, 'yesterday_us.json')
+    uk_json_path = os.path.join(cache_dir, 'yesterday_uk.json')
     
     print(f"  Looking for cache:")
     print(f"    US: {us_path} - exists: {os.path.exists(us_path)}")
     print(f"    UK: {uk_path} - exists: {os.path.exists(uk_path)}")
     
-    if not os.path.exists(us_path) or not os.path.exists(uk_path):
-        return None, None
-    
     try:
-        with open(us_path, 'r') as f:
-            us_data = json.load(f)
-        with open(uk_path, 'r') as f:
-            uk_data = json.load(f)
-        # Validate cache structure - must be lists of dicts
-        if not isinstance(us_data, list) or not isinstance(uk_data, list):
-            print(f"  Cache format invalid (expected list, got {type(us_data).__name__}/{type(uk_data).__name__})")
+        if os.path.exists(us_path) and os.path.exists(uk_path):
+            us_df = pd.read_parquet(us_path, engine='pyarrow')
+            uk_df = pd.read_parquet(uk_path, engine='pyarrow')
+        elif os.path.exists(us_json_path) and os.path.exists(uk_json_path):
+            print(f"    Falling back to legacy JSON cache")
+            us_df, uk_df = _load_legacy_json_cache(us_json_path, uk_json_path)
+            if us_df is None:
+                return None, None
+        else:
             return None, None
-        print(f"    Loaded US: {len(us_data)} records")
-        print(f"    Loaded UK: {len(uk_data)} records")
-        return us_data, uk_data
+        print(f"    Loaded US: {len(us_df)} records")
+        print(f"    Loaded UK: {len(uk_df)} records")
+        return (us_df if len(us_df) > 0 else None), (uk_df if len(uk_df) > 0 else None)
     except Exception as e:
         print(f"  Cache load error: {e}")
         return None, None
@@ -734,33 +827,28 @@ def save_today_cache(us_df, uk_df, cache_dir):
     """Save today's data for tomorrow's comparison."""
     os.makedirs(cache_dir, exist_ok=True)
     
-    us_path = os.path.join(cache_dir, 'yesterday_us.json')
-    uk_path = os.path.join(cache_dir, 'yesterday_uk.json')
+    us_path = os.path.join(cache_dir, 'yesterday_us.parquet')
+    uk_path = os.path.join(cache_dir, 'yesterday_uk.parquet')
     
     print(f"  Saving cache to:")
     print(f"    US: {us_path}")
     print(f"    UK: {uk_path}")
     
     # Save only necessary columns for 24h tracking
-    # Replace NaN with 0 to produce valid JSON
+    # Replace NaN momentum with 0 so tomorrow's deltas stay numeric
     if len(us_df) > 0:
-        cache_df = us_df[['webVideoUrl', 'momentum_score']].copy()
-        cache_df['momentum_score'] = cache_df['momentum_score'].fillna(0)
-        us_cache = cache_df.to_dict('records')
+        us_cache = us_df[CACHE_COLUMNS].copy()
+        us_cache['momentum_score'] = us_cache['momentum_score'].fillna(0)
     else:
-        us_cache = []
+        us_cache = pd.DataFrame(columns=CACHE_COLUMNS)
     if len(uk_df) > 0:
-        cache_df = uk_df[['webVideoUrl', 'momentum_score']].copy()
-        cache_df['momentum_score'] = cache_df['momentum_score'].fillna(0)
-        uk_cache = cache_df.to_dict('records')
+        uk_cache = uk_df[CACHE_COLUMNS].copy()
+        uk_cache['momentum_score'] = uk_cache['momentum_score'].fillna(0)
     else:
-        uk_cache = []
-    
-    with open(us_path, 'w') as f:
-        json.dump(us_cache, f)
+        uk_cache = pd.DataFrame(columns=CACHE_COLUMNS)
     
-    with open(uk_path, 'w') as f:
-        json.dump(uk_cache, f)
+    us_cache.to_parquet(us_path, engine='pyarrow', compression='zstd', index=False)
+    uk_cache.to_parquet(uk_path, engine='pyarrow', compression='zstd', index=False)
     
     print(f"    US records: {len(us_cache)}")
     print(f"    UK records: {len(uk_cache)}")
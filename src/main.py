@@ -12,84 +12,101 @@ Changes from 5.3.0:
 import os
 import sys
 import json
+from concurrent.futures import ThreadPoolExecutor
 
 # Add src to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from apify_fetcher import fetch_all_data
-from daily_processor import process_data, load_yesterday_cache, save_today_cache, calculate_metrics
+from daily_processor import (
+    process_data, load_yesterday_cache, save_today_cache, calculate_metrics, downcast,
+    get_author_name_vec, detect_ai_batch, calculate_status, calculate_build_now_vec
+)
 from discord_notify import send_discord_notification
 from v35_enhancements import integrate_with_daily_processor, generate_daily_briefing
 import pandas as pd
+import numpy as np
+import pyarrow as pa
 
 
-def run_v35_enhancements(us_data, uk_data, yesterday_us, yesterday_uk, output_dir, cache_dir):
+def _records_to_df(records):
     """
-    Run v3.5.0 enhanced analytics: velocity predictions, competitor analysis,
-    variant allocation, and stop rules.
+    Build a DataFrame from raw Apify records in one Arrow conversion pass.
     
-    Returns dict of generated file paths, or empty dict on failure.
+    pa.array() infers the struct type from all records (not just the first),
+    so sparse keys are kept. Falls back to pd.DataFrame if a field mixes
+    types Arrow can't unify or holds an integer outside 64 bits.
     """
+    if not records:
+        return pd.DataFrame()
     try:
-        from v35_enhancements import integrate_with_daily_processor
-    except ImportError as e:
-        print(f"  WARNING: v3.5.0 enhancements not available: {e}")
-        print("  Continuing with standard files only.")
-        return {}
-    
-    print("\n[Step 3b] Running v3.5.0 Enhanced Analytics...")
+        return pa.Table.from_struct_array(pa.array(records)).to_pandas()
+    except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+        return pd.DataFrame(records)
+
+
+def _dedup_records(records):
+    """Drop repeated webVideoUrl records from a raw Apify list, keeping the first."""
+    seen = set()
+    out = []
+    for r in records:
+        u = r.get('webVideoUrl')
+        if u not in seen:
+            seen.add(u)
+            out.append(r)
+    return out
+
+
+def _build_base_df(records):
+    """Build one market's base frame: metrics plus the market-independent author and AI columns."""
+    if not records:
+        return pd.DataFrame()
+    df = calculate_metrics(_records_to_df(records))
+    df['author'] = get_author_name_vec(df)
+    df['AI_CATEGORY'] = detect_ai_batch(df.get('text', pd.Series('', index=df.index)))
+    return df
+
+
+def _prepare_enhancement_df(df, yesterday, other_urls, market_label):
+    """
+    Add status, BUILD_NOW and Market columns for one market.
+    Expects a base frame from _build_base_df (metrics, author, AI_CATEGORY).
     
-    # Convert raw data to DataFrames with calculated metrics
-    us_df = pd.DataFrame(us_data) if us_data else pd.DataFrame()
-    uk_df = pd.DataFrame(uk_data) if uk_data else pd.DataFrame()
+    Rows whose URL is in other_urls are marked BOTH, the rest market_label.
+    """
+    if len(df) == 0:
+        return df
     
-    if len(us_df) > 0:
-        us_df = us_df.drop_duplicates(subset=['webVideoUrl'], keep='first')
-        us_df = calculate_metrics(us_df)
-        # Add author column needed by enhancements
-        from daily_processor import get_author_name, detect_ai, calculate_status, calculate_build_now
-        us_df['author'] = us_df.apply(get_author_name, axis=1)
-        us_df['AI_CATEGORY'] = us_df.get('text', pd.Series([''])).apply(detect_ai)
-        us_df = calculate_status(us_df, yesterday_us)
-        us_df['BUILD_NOW'] = us_df.apply(calculate_build_now, axis=1)
-        # Cross-market detection
-        uk_urls = set(pd.DataFrame(uk_data)['webVideoUrl']) if uk_data else set()
-        us_df['Market'] = us_df['webVideoUrl'].apply(
-            lambda u: '🌐 BOTH' if u in uk_urls else '🇺🇸 US ONLY'
-        )
-        # Map status column name for enhancements
-        if 'status' in us_df.columns and 'acceleration_status' not in us_df.columns:
-            us_df['acceleration_status'] = us_df['status']
+    df = df.copy()
+    df = calculate_status(df, yesterday)
+    df['BUILD_NOW'] = calculate_build_now_vec(df)
+    # Cross-market detection
+    df['Market'] = np.where(df['webVideoUrl'].isin(other_urls), '🌐 BOTH', market_label)
+    # Map status column name for enhancements
+    if 'status' in df.columns and 'acceleration_status' not in df.columns:
+        df['acceleration_status'] = df['status']
+    return downcast(df)
+
+
+def run_v35_enhancements(us_df_base, uk_df_base, us_urls, uk_urls, yesterday_us, yesterday_uk, output_dir, cache_dir):
+    """
+    Run v3.5.0 enhanced analytics: velocity predictions, competitor analysis,
+    variant allocation, and stop rules.
     
-    if len(uk_df) > 0:
-        uk_df = uk_df.drop_duplicates(subset=['webVideoUrl'], keep='first')
-        uk_df = calculate_metrics(uk_df)
-        from daily_processor import get_author_name, detect_ai, calculate_status, calculate_build_now
-        uk_df['author'] = uk_df.apply(get_author_name, axis=1)
-        uk_df['AI_CATEGORY'] = uk_df.get('text', pd.Series([''])).apply(detect_ai)
-        uk_df = calculate_status(uk_df, yesterday_uk)
-        uk_df['BUILD_NOW'] = uk_df.apply(calculate_build_now, axis=1)
-        us_urls = set(pd.DataFrame(us_data)['webVideoUrl']) if us_data else set()
-        uk_df['Market'] = uk_df['webVideoUrl'].apply(
-            lambda u: '🌐 BOTH' if u in us_urls else '🇬🇧 UK ONLY'
-        )
-        if 'status' in uk_df.columns and 'acceleration_status' not in uk_df.columns:
-            uk_df['acceleration_status'] = uk_df['status']
+    Takes the deduplicated base DataFrames and URL indexes built once in main().
+    Returns dict of generated file paths, or empty dict on failure.
+    """
+    print("\n[Step 3b] Running v3.5.0 Enhanced Analytics...")
     
-    # Convert yesterday's cache to DataFrames for velocity calculations
-    yesterday_us_df = None
-    yesterday_uk_df = None
-    if yesterday_us:
-        yesterday_us_df = pd.DataFrame(yesterday_us)
-    if yesterday_uk:
-        yesterday_uk_df = pd.DataFrame(yesterday_uk)
+    us_df = _prepare_enhancement_df(us_df_base, yesterday_us, uk_urls, '🇺🇸 US ONLY')
+    uk_df = _prepare_enhancement_df(uk_df_base, yesterday_uk, us_urls, '🇬🇧 UK ONLY')
     
     try:
         enhanced_files = integrate_with_daily_processor(
             us_data=us_df,
             uk_data=uk_df,
-            yesterday_us=yesterday_us_df,
-            yesterday_uk=yesterday_uk_df,
+            yesterday_us=yesterday_us,
+            yesterday_uk=yesterday_uk,
             two_days_us=None,  # Not available in current cache system
             two_days_uk=None,
             output_dir=output_dir
@@ -142,11 +159,22 @@ def main():
     print(f"  US music: {len(us_music) if us_music else 0}")
     print(f"  UK music: {len(uk_music) if uk_music else 0}")
     
+    # Dedup the raw records once - us_data/uk_data stay raw for process_data's raw counts
+    us_unique = _dedup_records(us_data) if us_data else []
+    uk_unique = _dedup_records(uk_data) if uk_data else []
+    
+    # Build the base DataFrames (metrics, author, AI_CATEGORY) once - reused by Steps 3b, 3c and 4
+    us_df_base = _build_base_df(us_unique)
+    uk_df_base = _build_base_df(uk_unique)
+    # Hash indexes of each market's URLs for the cross-market isin() lookups
+    us_urls_idx = pd.Index(us_df_base['webVideoUrl'].to_numpy()) if len(us_df_base) > 0 else pd.Index([])
+    uk_urls_idx = pd.Index(uk_df_base['webVideoUrl'].to_numpy()) if len(uk_df_base) > 0 else pd.Index([])
+    
     # Step 2: Load yesterday's cache
     print("\n[Step 2] Loading yesterday's cache...")
     yesterday_us, yesterday_uk = load_yesterday_cache(cache_dir)
     
-    if yesterday_us and yesterday_uk:
+    if yesterday_us is not None and yesterday_uk is not None:
         print(f"  Cache found! US: {len(yesterday_us)}, UK: {len(yesterday_uk)} records")
     else:
         print("  No cache found - all statuses will be NEW")
@@ -162,7 +190,8 @@ def main():
     
     # Step 3b: Run v3.5.0 enhancements (non-blocking)
     enhanced_files = run_v35_enhancements(
-        us_data, uk_data,
+        us_df_base, uk_df_base,
+        us_urls_idx, uk_urls_idx,
         yesterday_us, yesterday_uk,
         output_dir, cache_dir
     )
@@ -173,53 +202,47 @@ def main():
     
     # Step 3c: Generate daily briefing and append to SUMMARY_REPORT
     print("\n[Step 3c] Generating daily briefing...")
-    try:
-        # Combine US + UK for full-picture briefing
-        combined_df = pd.concat(
-            [df for df in [
-                pd.DataFrame(us_data) if us_data else pd.DataFrame(),
-                pd.DataFrame(uk_data) if uk_data else pd.DataFrame()
-            ] if len(df) > 0],
-            ignore_index=True
-        )
-        
-        if len(combined_df) > 0:
+    if len(us_df_base) == 0 and len(uk_df_base) == 0:
+        # Nothing to brief on - skip before building the combined frame
+        print("  ⚠️ No data available for briefing")
+    else:
+        try:
+            # Combine US + UK for full-picture briefing
+            frames = []
+            if len(us_df_base) > 0:
+                frames.append(us_df_base)
+            if len(uk_df_base) > 0:
+                frames.append(uk_df_base)
+            combined_df = pd.concat(frames, ignore_index=True)
+            
+            # Metrics, author and AI_CATEGORY come from the base frames - only
+            # Market and status (against the combined cache) are recomputed here
             combined_df = combined_df.drop_duplicates(subset=['webVideoUrl'], keep='first')
-            combined_df = calculate_metrics(combined_df)
-            from daily_processor import get_author_name, detect_ai, calculate_status, calculate_build_now
-            combined_df['author'] = combined_df.apply(get_author_name, axis=1)
-            combined_df['AI_CATEGORY'] = combined_df.get('text', pd.Series([''])).apply(detect_ai)
             
             # Cross-market detection
-            us_urls = set(pd.DataFrame(us_data)['webVideoUrl']) if us_data else set()
-            uk_urls = set(pd.DataFrame(uk_data)['webVideoUrl']) if uk_data else set()
-            both_urls = us_urls & uk_urls
-            combined_df['Market'] = combined_df['webVideoUrl'].apply(
-                lambda u: '🌐 BOTH' if u in both_urls else '🇺🇸/🇬🇧 SINGLE'
+            both_urls = us_urls_idx.intersection(uk_urls_idx)
+            combined_df['Market'] = np.where(
+                combined_df['webVideoUrl'].isin(both_urls), '🌐 BOTH', '🇺🇸/🇬🇧 SINGLE'
             )
             
             # Status calculation
             combined_yesterday = None
-            if yesterday_us and yesterday_uk:
-                combined_yesterday = yesterday_us + yesterday_uk
-            elif yesterday_us:
+            if yesterday_us is not None and yesterday_uk is not None:
+                combined_yesterday = pd.concat([yesterday_us, yesterday_uk], ignore_index=True)
+            elif yesterday_us is not None:
                 combined_yesterday = yesterday_us
-            elif yesterday_uk:
+            elif yesterday_uk is not None:
                 combined_yesterday = yesterday_uk
             combined_df = calculate_status(combined_df, combined_yesterday)
             if 'status' in combined_df.columns:
                 combined_df['acceleration_status'] = combined_df['status']
-            
-            # Yesterday as DataFrame for velocity
-            yesterday_combined_df = None
-            if combined_yesterday:
-                yesterday_combined_df = pd.DataFrame(combined_yesterday)
+            combined_df = downcast(combined_df)
             
             cache_dir_path = os.environ.get('CACHE_DIR', 'data')
             streak_cache = os.path.join(cache_dir_path, 'velocity_streak_cache.json')
             
             briefing_text = generate_daily_briefing(
-                combined_df, yesterday_combined_df,
+                combined_df, combined_yesterday,
                 output_dir, cache_path=streak_cache
             )
             
@@ -228,37 +251,25 @@ def main():
             today = datetime.now().strftime('%Y-%m-%d')
             summary_path = f"{output_dir}/SUMMARY_REPORT_{today}.txt"
             
-            with open(summary_path, 'a') as f:
-                f.write("\n\n")
-                f.write(briefing_text)
+            with open(summary_path, 'ab', buffering=0) as f:
+                f.write(b"\n\n" + briefing_text.encode('utf-8'))
             
             print("  ✅ Daily briefing appended to SUMMARY_REPORT")
-        else:
-            print("  ⚠️ No data available for briefing")
-    except Exception as e:
-        print(f"  ❌ Briefing generation error: {e}")
-        import traceback
-        traceback.print_exc()
-        print("  Continuing without briefing.")
+        except Exception as e:
+            print(f"  ❌ Briefing generation error: {e}")
+            import traceback
+            traceback.print_exc()
+            print("  Continuing without briefing.")
     
-    # Step 4: Save today's cache for tomorrow
+    # Step 4 + 5: Save today's cache (disk) and send Discord notification (network)
+    # They are independent and I/O bound, so overlap them on two threads
     print("\n[Step 4] Saving cache for tomorrow...")
-    us_df = pd.DataFrame(us_data) if us_data else pd.DataFrame()
-    uk_df = pd.DataFrame(uk_data) if uk_data else pd.DataFrame()
-    
-    if len(us_df) > 0:
-        us_df = us_df.drop_duplicates(subset=['webVideoUrl'], keep='first')
-        us_df = calculate_metrics(us_df)
-    
-    if len(uk_df) > 0:
-        uk_df = uk_df.drop_duplicates(subset=['webVideoUrl'], keep='first')
-        uk_df = calculate_metrics(uk_df)
-    
-    save_today_cache(us_df, uk_df, cache_dir)
-    
-    # Step 5: Send Discord notification
-    print("\n[Step 5] Sending Discord notification...")
-    send_discord_notification(stats)
+    print("[Step 5] Sending Discord notification...")
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        fut_cache = executor.submit(save_today_cache, us_df_base, uk_df_base, cache_dir)
+        fut_notify = executor.submit(send_discord_notification, stats)
+        fut_cache.result()
+        fut_notify.result()
     
     # Done
     print("\n" + "=" * 50)